@@ -1,128 +1,410 @@
 """Batch processor for running GPT-OSS-20B on multiple files."""
 
+import asyncio
 import os
+import random
 import sys
 import time
-from functools import partial
-from multiprocessing import Pool, Value, Lock
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from pathlib import Path
 
+import aiofiles
+import aiofiles.os
+import openai
+import orjson
 from tqdm import tqdm
 
-from client import GPTOSSClient
-from config import Config
+from client import AsyncGPTOSSClient
 
 
 DEFAULT_MAX_RPM = 300
+LOG_BATCH_SIZE = 64  # max log lines coalesced into one write
 
+ADAPTIVE_MIN_RPM = 10  # floor for the adaptive rate
+ADAPTIVE_PROBE_EVERY = 10  # successful requests per +1 RPM increase
+ADAPTIVE_BACKOFF_COOLDOWN = 5.0  # seconds; a burst of 429s halves the rate once
 
-class RateLimiter:
-    """Token-bucket style rate limiter for multiprocessing.
+RETRY_INITIAL_DELAY = 0.5  # seconds, doubled per attempt
+RETRY_MAX_DELAY = 8.0  # cap for the exponential backoff
+RETRY_AFTER_MAX = 60.0  # Retry-After values above this fall back to backoff
 
-    Each worker reserves a time slot, releases the lock, then sleeps
-    until its slot arrives. This spreads requests evenly across time.
-    """
+# (input_path, raw_path, gen_path, relative_path), precomputed per file
+WorkItem = tuple[str, str, str, str]
 
-    def __init__(self, max_rpm: int):
-        self.max_rpm = max_rpm
-        self.interval = 60.0 / max_rpm  # minimum seconds between requests
-        self._next_slot = Value('d', 0.0)  # next allowed request time
-        self._lock = Lock()
 
-    def acquire(self):
-        """Wait until a request slot is available."""
-        with self._lock:
-            now = time.monotonic()
-            wait_time = max(0.0, self._next_slot.value - now)
-            self._next_slot.value = max(now, self._next_slot.value) + self.interval
+def _initial_rpm(max_rpm: int) -> int:
+    """Starting rate of the adaptive limiter: half of max_rpm, above the floor."""
+    return max(min(ADAPTIVE_MIN_RPM, max_rpm), max_rpm // 2)
 
-        if wait_time > 0:
-            time.sleep(wait_time)
 
+class AdaptiveLimiter:
+    """AIMD rate limiter that adapts to the server's real rate limit.
 
-class BatchConfig:
-    """Configuration for batch processing."""
-
-    def __init__(self, input_dir: str, output_dir: str, file_pattern: str = "**/*.rs"):
-        self.input_dir = Path(input_dir).resolve()
-        self.output_dir = Path(output_dir).resolve()
-        self.file_pattern = file_pattern
-        self.raw_dir = self.output_dir / "raw_responses"
-        self.generated_dir = self.output_dir / "generated_texts"
+    Starts at half of max_rpm and adds 1 request/min for every
+    ADAPTIVE_PROBE_EVERY successful requests. The rate is halved when the
+    server answers 429, and always stays between ADAPTIVE_MIN_RPM and
+    max_rpm. Requests are spaced evenly by a single scheduler shared by
+    all waiters, so a rate change also applies to requests that are
+    already waiting.
+    """
 
-        os.makedirs(self.raw_dir, exist_ok=True)
-        os.makedirs(self.generated_dir, exist_ok=True)
+    def __init__(self, max_rpm: int, log: asyncio.Queue | None = None):
+        self.max_rpm = max_rpm
+        self.min_rpm = min(ADAPTIVE_MIN_RPM, max_rpm)
+        self.current_rpm = _initial_rpm(max_rpm)
+        self._log = log
+        self._successes = 0
+        self._last_backoff = float("-inf")
+        self._last_slot = float("-inf")
+        self._lock = asyncio.Lock()
+
+    def _set_rate(self, rpm: int):
+        """Switch to a new rate, logging the change."""
+        if rpm == self.current_rpm:
+            return
+        if self._log is not None:
+            self._log.put_nowait(f"[RATE] {self.current_rpm} -> {rpm} requests/min\n")
+        self.current_rpm = rpm
+
+    def probe(self):
+        """Record a successful request, raising the rate every few successes."""
+        self._successes += 1
+        if self._successes >= ADAPTIVE_PROBE_EVERY:
+            self._successes = 0
+            self._set_rate(min(self.max_rpm, self.current_rpm + 1))
+
+    def backoff(self):
+        """Halve the rate after a 429 response."""
+        now = time.monotonic()
+        if now - self._last_backoff < ADAPTIVE_BACKOFF_COOLDOWN:
+            return
+        self._last_backoff = now
+        self._successes = 0
+        self._set_rate(max(self.min_rpm, self.current_rpm // 2))
+
+    async def __aenter__(self):
+        # Waiters queue on one (FIFO) lock, and the holder re-reads
+        # current_rpm after every sleep, so at most one request is released
+        # per interval at the current rate.
+        async with self._lock:
+            while True:
+                interval = 60 / self.current_rpm
+                slot = self._last_slot + interval
+                now = time.monotonic()
+                if now >= slot:
+                    break
+                await asyncio.sleep(slot - now)
+            # Anchor to the scheduled slot rather than the actual wake-up, so
+            # sleep overshoot doesn't accumulate and lower the real rate. After
+            # an idle gap longer than one interval, restart from now instead.
+            self._last_slot = slot if now - slot < interval else now
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+
+@dataclass(frozen=True, slots=True)
+class BatchConfig:
+    """Configuration for batch processing, with all directories resolved."""
+
+    input_dir: str
+    output_dir: str
+    raw_dir: str
+    generated_dir: str
+    file_pattern: str = "**/*.rs"
+    save_raw: bool = True
+
+    @classmethod
+    def build(
+        cls,
+        input_dir: str,
+        output_dir: str,
+        file_pattern: str = "**/*.rs",
+        save_raw: bool = True,
+    ) -> "BatchConfig":
+        """Resolve the input/output directories and derive the output subdirectories."""
+        output_path = Path(output_dir).resolve()
+        return cls(
+            input_dir=str(Path(input_dir).resolve()),
+            output_dir=str(output_path),
+            raw_dir=str(output_path / "raw_responses"),
+            generated_dir=str(output_path / "generated_texts"),
+            file_pattern=file_pattern,
+            save_raw=save_raw,
+        )
+
+
+def prepare_dirs(batch_config: BatchConfig):
+    """Create the top-level output directories."""
+    if batch_config.save_raw:
+        os.makedirs(batch_config.raw_dir, exist_ok=True)
+    os.makedirs(batch_config.generated_dir, exist_ok=True)
+
+
+def _iter_files(root: str, suffix: str) -> Iterator[str]:
+    """Recursively yield paths of regular files under root ending with suffix.
+
+    Like Path.glob, missing or unreadable directories are skipped silently.
+    """
+    stack = [root]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(suffix) and entry.is_file():
+                    yield entry.path
+
+
+def _find_files(input_dir: str, file_pattern: str) -> list[Path]:
+    """Find input files matching a glob pattern.
+
+    Patterns of the form "**/*<suffix>" are walked with os.scandir, which
+    avoids a stat per entry; anything more complex falls back to Path.glob.
+    """
+    prefix = "**/*"
+    suffix = file_pattern[len(prefix):]
+    if file_pattern.startswith(prefix) and not any(c in suffix for c in "*?[/"):
+        return [Path(p) for p in _iter_files(input_dir, suffix)]
+    return list(Path(input_dir).glob(file_pattern))
 
 
-# Module-level globals set by init_worker
-WORKER_ID = 0
-RATE_LIMITER: RateLimiter | None = None
+async def _write_file(path: str, data: str | bytes):
+    """Write text or bytes to a file without blocking the event loop.
 
+    The data is written to a temporary sibling and renamed into place, so
+    an interrupted run never leaves a truncated output file behind.
+    """
+    tmp_path = path + ".tmp"
+    if isinstance(data, bytes):
+        opener = aiofiles.open(tmp_path, "wb")
+    else:
+        opener = aiofiles.open(tmp_path, "w", encoding="utf-8")
+    async with opener as f:
+        await f.write(data)
+    await aiofiles.os.replace(tmp_path, path)
 
-def init_worker(counter, lock, rate_limiter):
-    """Initialize worker with unique ID and shared rate limiter."""
-    global WORKER_ID, RATE_LIMITER
-    with lock:
-        counter.value += 1
-        WORKER_ID = counter.value
-    RATE_LIMITER = rate_limiter
 
+async def _log_writer(log_path: str, log: asyncio.Queue):
+    """Drain log lines from the queue until a None sentinel arrives.
 
-def process_file(batch_config: BatchConfig, input_filepath: Path) -> int:
+    The log file is opened once per run, and lines that queue up while a
+    write is in progress are coalesced into a single write.
+    """
+    async with aiofiles.open(log_path, "a", encoding="utf-8") as f:
+        while True:
+            lines = [await log.get()]
+            while len(lines) < LOG_BATCH_SIZE and not log.empty():
+                lines.append(log.get_nowait())
+
+            # The sentinel is always the last item queued.
+            done = lines[-1] is None
+            if done:
+                lines.pop()
+            if lines:
+                await f.write("".join(lines))
+                await f.flush()
+            if done:
+                return
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Whether a failed request is worth retrying: connection errors, 408/409/429 and 5xx."""
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return False
+
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    """Seconds to wait before retrying: the server's Retry-After, or jittered exponential backoff."""
+    response = getattr(error, "response", None)
+    if response is not None:
+        try:
+            retry_after = float(response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            retry_after = None
+        if retry_after is not None and 0 <= retry_after <= RETRY_AFTER_MAX:
+            return retry_after
+    delay = min(RETRY_INITIAL_DELAY * 2**attempt, RETRY_MAX_DELAY)
+    return delay * (1 - 0.25 * random.random())
+
+
+async def process_file_async(
+    batch_config: BatchConfig,
+    item: WorkItem,
+    client: AsyncGPTOSSClient,
+    sem: asyncio.Semaphore,
+    limiter: AdaptiveLimiter,
+    log: asyncio.Queue,
+):
     """Process a single file through the model."""
-    global WORKER_ID, RATE_LIMITER
-    idx = WORKER_ID
+    input_filepath, raw_path, gen_path, relative_path = item
+
+    async with sem:
+        # Zero-byte files are skipped without being opened.
+        content = ""
+        if (await aiofiles.os.stat(input_filepath)).st_size:
+            async with aiofiles.open(input_filepath, "r", encoding="utf-8") as f:
+                content = await f.read()
+
+        # isspace() stops at the first non-whitespace character, unlike strip()
+        # which copies the whole string.
+        if not content or content.isspace():
+            log.put_nowait(f"[EMPTY] {relative_path}\n")
+            return
+
+        # The client is built without SDK retries, so every attempt,
+        # including retries, goes through the rate limiter.
+        max_retries = client.config.max_retries
+        for attempt in range(max_retries + 1):
+            try:
+                async with limiter:
+                    response = await client.query(content)
+                break
+            except Exception as e:
+                if isinstance(e, openai.RateLimitError):
+                    limiter.backoff()
+                if attempt == max_retries or not _is_retryable(e):
+                    log.put_nowait(f"[ERROR] {relative_path}: {e}\n")
+                    return
+                await asyncio.sleep(_retry_delay(e, attempt))
+        limiter.probe()
+
+    # Outputs are written after releasing the semaphore, so the next request
+    # can go out while this file's results are still being written to disk.
+    if batch_config.save_raw:
+        await _write_file(raw_path, response.model_dump_json())
 
-    client = GPTOSSClient()
-    log_path = batch_config.output_dir / f"processing_log.{idx}.txt"
-
-    with open(input_filepath, "r", encoding="utf-8") as f:
-        content = f.read()
-
-    if not content.strip():
-        with open(log_path, "a", encoding="utf-8") as log:
-            log.write(f"[EMPTY] {input_filepath.relative_to(batch_config.input_dir)}\n")
-        return idx
-
-    relative_path = input_filepath.relative_to(batch_config.input_dir)
-    filename = input_filepath.stem
+    if not response.choices:
+        log.put_nowait(f"[NO_CHOICES] {relative_path}\n")
+        return
 
-    raw_path = batch_config.raw_dir / relative_path.parent / f"{filename}.txt"
-    gen_path = batch_config.generated_dir / relative_path.parent / f"{filename}.json"
+    generated_text = response.choices[0].message.content
+    if generated_text:
+        await _write_file(gen_path, orjson.dumps({
+            "text": generated_text,
+            "model": response.model,
+            "usage": response.usage.model_dump() if response.usage else None,
+        }))
+        log.put_nowait(f"[PROCESSED] {relative_path}\n")
+    else:
+        log.put_nowait(f"[GEN_NONE] {relative_path}\n")
 
-    os.makedirs(raw_path.parent, exist_ok=True)
-    os.makedirs(gen_path.parent, exist_ok=True)
 
-    # Wait for rate limiter before making API call
-    if RATE_LIMITER is not None:
-        RATE_LIMITER.acquire()
+async def _main(
+    batch_config: BatchConfig,
+    work: list[WorkItem],
+    client: AsyncGPTOSSClient,
+    num_workers: int,
+    max_rpm: int,
+):
+    """Fan out all files over a single event loop."""
+    # File I/O (aiofiles) and token refreshes run on the default executor.
+    # Size it to the request concurrency rather than the CPU count, using
+    # the same formula as ThreadPoolExecutor's own default.
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=min(32, num_workers + 4), thread_name_prefix="batch-io")
+    )
+
+    # All tasks share one process, so the PID identifies this run's log.
+    log_path = os.path.join(batch_config.output_dir, f"processing_log.{os.getpid()}.txt")
+    log: asyncio.Queue = asyncio.Queue()
+    writer = asyncio.create_task(_log_writer(log_path, log))
+
+    sem = asyncio.Semaphore(num_workers)
+    limiter = AdaptiveLimiter(max_rpm, log)
+
+    # A fixed pool of consumers pulls from a bounded queue, so the number of
+    # live coroutines stays constant however many files there are. There
+    # are twice as many consumers as request slots, so that finished
+    # requests can write their outputs while the slots are reused.
+    num_consumers = 2 * num_workers
+    queue: asyncio.Queue = asyncio.Queue(maxsize=num_workers * 4)
+
+    async def producer():
+        for item in work:
+            await queue.put(item)
+        for _ in range(num_consumers):
+            await queue.put(None)
+
+    async def consumer(progress: tqdm):
+        while (item := await queue.get()) is not None:
+            await process_file_async(batch_config, item, client, sem, limiter, log)
+            progress.update()
 
     try:
-        response = client.query(content)
-    except Exception as e:
-        with open(log_path, "a", encoding="utf-8") as log:
-            log.write(f"[ERROR] {relative_path}: {e}\n")
-        return idx
-
-    with open(raw_path, "w", encoding="utf-8") as f:
-        f.write(str(response))
+        with tqdm(total=len(work)) as progress:
+            await asyncio.gather(producer(), *(consumer(progress) for _ in range(num_consumers)))
+    finally:
+        log.put_nowait(None)
+        await writer
+        await client.aclose()
 
-    if not response.choices:
-        with open(log_path, "a", encoding="utf-8") as log:
-            log.write(f"[NO_CHOICES] {relative_path}\n")
-        return idx
 
-    generated_text = response.choices[0].message.content
-    if generated_text:
-        with open(gen_path, "w", encoding="utf-8") as f:
-            f.write(generated_text)
-        with open(log_path, "a", encoding="utf-8") as log:
-            log.write(f"[PROCESSED] {relative_path}\n")
-    else:
-        with open(log_path, "a", encoding="utf-8") as log:
-            log.write(f"[GEN_NONE] {relative_path}\n")
+def _plan_work(batch_config: BatchConfig) -> tuple[list[Path], list[WorkItem], set[str]]:
+    """Discover input files and precompute the work still to be done.
 
-    return idx
+    Returns all matching files, the work items for files not yet processed,
+    and the relative subdirectories those work items write into.
+    """
+    # Sorted so that files in the same directory are processed together.
+    files = sorted(_find_files(batch_config.input_dir, batch_config.file_pattern))
+
+    # Files with a generated output from an earlier run are skipped, so an
+    # interrupted run can be resumed. Outputs are renamed into place only
+    # once fully written, so an existing file is always complete.
+    completed = set(_iter_files(batch_config.generated_dir, ".json"))
+
+    # Output paths are computed once here rather than in every task.
+    work: list[WorkItem] = []
+    parents = set()
+    for filepath in files:
+        relative_path = filepath.relative_to(batch_config.input_dir)
+        # dirname() is "" for top-level files, so joined paths stay normalized
+        # and match what _iter_files yields.
+        relative_dir = os.path.dirname(relative_path)
+        gen_path = os.path.join(batch_config.generated_dir, relative_dir, f"{filepath.stem}.json")
+        if gen_path in completed:
+            continue
+        parents.add(relative_dir)
+        work.append((
+            str(filepath),
+            os.path.join(batch_config.raw_dir, relative_dir, f"{filepath.stem}.txt"),
+            gen_path,
+            str(relative_path),
+        ))
+
+    return files, work, parents
+
+
+def _write_files_found(path: str, files: list[Path]):
+    """Write the list of discovered input files, one per line."""
+    Path(path).write_text("\n".join(str(filepath) for filepath in files) + "\n", encoding="utf-8")
+
+
+def _min_duration(num_requests: int, max_rpm: int) -> float:
+    """Seconds the adaptive limiter needs to admit num_requests, assuming no 429s.
+
+    The rate starts at _initial_rpm(max_rpm) and rises by 1 RPM every
+    ADAPTIVE_PROBE_EVERY requests until it reaches max_rpm.
+    """
+    rpm = _initial_rpm(max_rpm)
+    seconds = 0.0
+    remaining = num_requests
+    while remaining > 0 and rpm < max_rpm:
+        batch = min(remaining, ADAPTIVE_PROBE_EVERY)
+        seconds += batch * 60 / rpm
+        remaining -= batch
+        rpm += 1
+    return seconds + remaining * 60 / max_rpm
 
 
 def _format_duration(seconds: float) -> str:
@@ -144,6 +426,7 @@ def run_batch(
     file_pattern: str = "**/*.rs",
     num_workers: int = 1,
     max_rpm: int = DEFAULT_MAX_RPM,
+    save_raw: bool = True,
 ):
     """Run batch processing on all matching files.
 
@@ -151,61 +434,87 @@ def run_batch(
         input_dir: Directory containing input files.
         output_dir: Directory for output files.
         file_pattern: Glob pattern for matching input files.
-        num_workers: Number of parallel worker processes.
-        max_rpm: Maximum requests per minute (rate limit).
+        num_workers: Maximum number of concurrent requests.
+        max_rpm: Maximum requests per minute. The actual rate adapts to 429
+            responses, starting at half of this value.
+        save_raw: Whether to save the full API response JSON for each file.
     """
-    batch_config = BatchConfig(input_dir, output_dir, file_pattern)
+    batch_config = BatchConfig.build(input_dir, output_dir, file_pattern, save_raw)
+    prepare_dirs(batch_config)
 
-    files = list(batch_config.input_dir.glob(file_pattern))
+    files, work, parents = _plan_work(batch_config)
     total_files = len(files)
 
     # Pre-run summary
     # min_duration: theoretical minimum time based only on rate limiter spacing.
-    # The rate limiter enforces a gap of (60 / max_rpm) seconds between requests.
+    # The adaptive limiter starts at max_rpm / 2 and ramps towards max_rpm,
+    # see _min_duration. It assumes no 429s slow the ramp down.
     # Even if every API call returned instantly (0 latency), this is the minimum
     # time needed. Actual duration will be longer due to API latency.
     # For small file counts, min_duration may be very short (e.g. 3s), meaning
     # the rate limiter is not the bottleneck — API latency dominates instead.
-    min_duration = total_files / max_rpm * 60  # seconds
+    min_duration = _min_duration(len(work), max_rpm)  # seconds
     print(f"{'='*50}")
     print(f"  Batch Processing Summary")
     print(f"{'='*50}")
     print(f"  Files found:    {total_files}")
+    print(f"  Already done:   {total_files - len(work)}")
     print(f"  Workers:        {num_workers}")
-    print(f"  Rate limit:     {max_rpm} requests/min")
+    print(f"  Rate limit:     {max_rpm} requests/min (max, adaptive)")
     print(f"  Min duration:   {_format_duration(min_duration)} (excluding API latency)")
     print(f"{'='*50}")
 
-    if total_files == 0:
+    files_found_path = os.path.join(batch_config.output_dir, "files_found.txt")
+    if not work:
+        # Everything is already done; still refresh the file list.
+        if files:
+            _write_files_found(files_found_path, files)
         print("No files to process.")
         return
 
-    with open(batch_config.output_dir / "files_found.txt", "w", encoding="utf-8") as f:
-        for filepath in files:
-            f.write(str(filepath) + "\n")
+    # SDK retries would bypass the rate limiter; process_file_async retries instead.
+    client = AsyncGPTOSSClient(max_connections=num_workers * 2, max_retries=0)
 
-    counter = Value('i', 0)
-    lock = Lock()
-    rate_limiter = RateLimiter(max_rpm)
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="batch-prep") as prep:
+        # Loading and refreshing GCP credentials is blocking network I/O, so it
+        # runs on the prep pool while the rest of startup proceeds.
+        warmup = prep.submit(client.warm_up)
 
-    with Pool(processes=num_workers, initializer=init_worker, initargs=(counter, lock, rate_limiter)) as pool:
-        func = partial(process_file, batch_config)
-        for _ in tqdm(pool.imap_unordered(func, files), total=total_files):
-            pass
+        # files_found.txt is written on the prep pool, concurrently with the
+        # rest of startup and the batch itself. Its result is checked once
+        # the batch finishes, so a failed write still raises.
+        files_found = prep.submit(_write_files_found, files_found_path, files)
+
+        # Create each output subdirectory once up front rather than per file.
+        for parent in parents:
+            if save_raw:
+                os.makedirs(os.path.join(batch_config.raw_dir, parent), exist_ok=True)
+            os.makedirs(os.path.join(batch_config.generated_dir, parent), exist_ok=True)
+
+        # Let the warm-up finish so requests don't start a second refresh. A
+        # failure is not raised here; it resurfaces per file as an [ERROR].
+        wait([warmup])
+
+        asyncio.run(_main(batch_config, work, client, num_workers, max_rpm))
+        files_found.result()
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: python batch_processor.py <input_dir> <output_dir> [file_pattern] [num_workers] [max_rpm]")
+    save_raw = "--no-raw" not in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != "--no-raw"]
+
+    if len(args) < 2:
+        print("Usage: python batch_processor.py <input_dir> <output_dir> [file_pattern] [num_workers] [max_rpm] [--no-raw]")
         print("  file_pattern: glob pattern (default: **/*.rs)")
-        print("  num_workers:  number of parallel workers (default: 1)")
+        print("  num_workers:  number of concurrent requests (default: 1)")
         print(f"  max_rpm:      max requests per minute (default: {DEFAULT_MAX_RPM})")
+        print("  --no-raw:     skip saving full API responses to raw_responses/")
         sys.exit(1)
 
-    input_dir = sys.argv[1]
-    output_dir = sys.argv[2]
-    file_pattern = sys.argv[3] if len(sys.argv) > 3 else "**/*.rs"
-    num_workers = int(sys.argv[4]) if len(sys.argv) > 4 else 1
-    max_rpm = int(sys.argv[5]) if len(sys.argv) > 5 else DEFAULT_MAX_RPM
+    input_dir = args[0]
+    output_dir = args[1]
+    file_pattern = args[2] if len(args) > 2 else "**/*.rs"
+    num_workers = int(args[3]) if len(args) > 3 else 1
+    max_rpm = int(args[4]) if len(args) > 4 else DEFAULT_MAX_RPM
 
-    run_batch(input_dir, output_dir, file_pattern, num_workers, max_rpm)
+    run_batch(input_dir, output_dir, file_pattern, num_workers, max_rpm, save_raw)
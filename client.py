@@ -1,5 +1,8 @@
 """GPT-OSS-20B Google Cloud client using Vertex AI MaaS."""
 
+import asyncio
+
+import httpx
 import openai
 from openai.types.chat.chat_completion import ChatCompletion
 from google.auth import default
@@ -11,15 +14,27 @@ from config import Config
 class GPTOSSClient:
     """Client for calling GPT-OSS-20B via Google Cloud Vertex AI."""
 
+    _openai_class = openai.OpenAI
+
     def __init__(self, config: Config | None = None):
         self.config = config or Config()
+        self._credentials = None
+        self._auth_request = requests.Request()
+        self._http_client = None  # None lets the SDK build its default
+        self._max_retries = self.config.max_retries
+        self._client = None
 
     def _get_gcp_token(self) -> str:
-        """Obtain GCP token using Application Default Credentials."""
-        credentials, _ = default()
-        auth_request = requests.Request()
-        credentials.refresh(auth_request)
-        return credentials.token
+        """Obtain GCP token using Application Default Credentials.
+
+        Credentials are loaded once and only refreshed when the cached
+        token is missing or about to expire.
+        """
+        if self._credentials is None:
+            self._credentials, _ = default()
+        if not self._credentials.valid:
+            self._credentials.refresh(self._auth_request)
+        return self._credentials.token
 
     def _get_endpoint_url(self) -> str:
         """Construct the Vertex AI MaaS endpoint URL."""
@@ -28,23 +43,39 @@ class GPTOSSClient:
             f"projects/{self.config.project_id}/locations/{self.config.location}/endpoints/openapi"
         )
 
-    def query(self, prompt: str) -> ChatCompletion:
-        """Send a prompt to the model and return the completion."""
-        client = openai.OpenAI(
-            base_url=self._get_endpoint_url(),
-            api_key=self._get_gcp_token(),
-        )
-
-        messages = [
+    def _build_messages(self, prompt: str) -> list[dict]:
+        """Wrap a prompt in the chat messages format."""
+        return [
             {
                 "role": "user",
                 "content": [{"type": "text", "text": prompt}],
             }
         ]
 
+    def _get_client(self, api_key: str):
+        """Return the cached OpenAI client, rebinding it if the token rotated.
+
+        with_options() shares the underlying HTTP connection pool, so
+        keep-alive connections survive token refreshes.
+        """
+        if self._client is None:
+            self._client = self._openai_class(
+                base_url=self._get_endpoint_url(),
+                api_key=api_key,
+                max_retries=self._max_retries,
+                http_client=self._http_client,
+            )
+        elif self._client.api_key != api_key:
+            self._client = self._client.with_options(api_key=api_key)
+        return self._client
+
+    def query(self, prompt: str) -> ChatCompletion:
+        """Send a prompt to the model and return the completion."""
+        client = self._get_client(self._get_gcp_token())
+
         response = client.chat.completions.create(
             model=self.config.model_id,
-            messages=messages,
+            messages=self._build_messages(prompt),
             max_tokens=self.config.max_tokens,
             temperature=self.config.temperature,
             top_p=self.config.top_p,
@@ -58,6 +89,79 @@ class GPTOSSClient:
         return response.choices[0].message.content
 
 
+class AsyncGPTOSSClient(GPTOSSClient):
+    """Asyncio variant of GPTOSSClient built on openai.AsyncOpenAI.
+
+    Args:
+        config: Client configuration.
+        max_connections: Size of the shared HTTP connection pool.
+        max_retries: Overrides config.max_retries for the SDK's internal
+            retries. Pass 0 to retry in the caller instead.
+    """
+
+    _openai_class = openai.AsyncOpenAI
+
+    def __init__(
+        self,
+        config: Config | None = None,
+        max_connections: int = 100,
+        max_retries: int | None = None,
+    ):
+        super().__init__(config)
+        if max_retries is not None:
+            self._max_retries = max_retries
+        self._refresh_lock = asyncio.Lock()
+        # One shared HTTP/2 pool: requests are multiplexed over a few
+        # connections instead of paying a TLS handshake per connection.
+        self._http_client = openai.DefaultAsyncHttpxClient(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+
+    def warm_up(self):
+        """Load and refresh GCP credentials ahead of the first request.
+
+        Blocking; meant to run on a worker thread before the event loop
+        starts, so the first requests don't wait on the token refresh.
+        """
+        self._get_gcp_token()
+
+    async def aclose(self):
+        """Close the shared HTTP connection pool."""
+        await self._http_client.aclose()
+
+    async def _get_gcp_token_async(self) -> str:
+        """Obtain GCP token, refreshing off the event loop only when needed."""
+        if self._credentials is None or not self._credentials.valid:
+            # Serialize refreshes so concurrent requests share one round-trip.
+            async with self._refresh_lock:
+                # Token refresh is a blocking HTTP call; keep it off the event loop.
+                return await asyncio.to_thread(self._get_gcp_token)
+        return self._credentials.token
+
+    async def query(self, prompt: str) -> ChatCompletion:
+        """Send a prompt to the model and return the completion."""
+        client = self._get_client(await self._get_gcp_token_async())
+
+        response = await client.chat.completions.create(
+            model=self.config.model_id,
+            messages=self._build_messages(prompt),
+            max_tokens=self.config.max_tokens,
+            temperature=self.config.temperature,
+            top_p=self.config.top_p,
+        )
+
+        return response
+
+    async def get_text(self, prompt: str) -> str | None:
+        """Send a prompt and return only the generated text."""
+        response = await self.query(prompt)
+        return response.choices[0].message.content
+
+
 if __name__ == "__main__":
     import sys
 
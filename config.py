@@ -13,3 +13,4 @@ class Config:
     max_tokens: int = 8192
     temperature: float = 0.7
     top_p: float = 1.0
+    max_retries: int = 5  # retries on 408/409/429/5xx, with backoff
@@ -11,20 +11,20 @@ def main():
     print()
 
     # Import and run each test module
-    from tests import test_cli, test_python_api, test_batch
+    from tests import test_cli, test_python_api, test_batch, test_batch_logic
 
-    print("1/3 Running CLI tests...")
+    print("1/4 Running CLI tests...")
     print("-" * 50)
     test_cli.test_cli_text_prompt()
     test_cli.test_cli_with_all_flag()
 
-    print("2/3 Running Python API tests...")
+    print("2/4 Running Python API tests...")
     print("-" * 50)
     test_python_api.test_default_config()
     test_python_api.test_custom_config()
     test_python_api.test_get_text_method()
 
-    print("3/3 Running Batch Processing tests...")
+    print("3/4 Running Batch Processing tests...")
     print("-" * 50)
     try:
         test_batch.test_batch_processing()
@@ -32,6 +32,20 @@ def main():
     finally:
         test_batch.cleanup()
 
+    print("4/4 Running Batch logic tests...")
+    print("-" * 50)
+    test_batch_logic.test_limiter_spacing()
+    test_batch_logic.test_limiter_no_drift()
+    test_batch_logic.test_limiter_probe()
+    test_batch_logic.test_limiter_backoff()
+    test_batch_logic.test_retries_go_through_limiter()
+    test_batch_logic.test_retries_give_up()
+    test_batch_logic.test_min_duration_follows_ramp()
+    test_batch_logic.test_find_files_matches_glob()
+    test_batch_logic.test_find_files_skips_missing_and_unreadable()
+    test_batch_logic.test_plan_work_skips_completed()
+    test_batch_logic.test_prepare_dirs_without_raw()
+
     print("=" * 50)
     print("ALL TESTS PASSED!")
     print("=" * 50)
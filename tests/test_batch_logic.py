@@ -0,0 +1,353 @@
+"""Test batch processing logic that needs no API credentials"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+import httpx
+import openai
+
+sys.path.insert(0, ".")
+
+import batch_processor
+from batch_processor import (
+    AdaptiveLimiter,
+    BatchConfig,
+    process_file_async,
+    _find_files,
+    _min_duration,
+    _plan_work,
+    prepare_dirs,
+)
+
+
+class FakeClock:
+    """Clock whose sleep() advances time instantly, oversleeping by overshoot."""
+
+    def __init__(self, overshoot: float = 0.0):
+        self.now = 1000.0
+        self.overshoot = overshoot
+        self._real_sleep = asyncio.sleep
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float):
+        self.now += delay + self.overshoot
+        await self._real_sleep(0)
+
+
+def _make_tree(root: Path, files: dict[str, str]):
+    """Create files (relative path -> content) under root."""
+    for filepath, content in files.items():
+        full_path = root / filepath
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        full_path.write_text(content)
+
+
+def _release_times(limiter: AdaptiveLimiter, count: int, on_release=None, overshoot: float = 0.0) -> list[float]:
+    """Run count concurrent acquisitions on a fake clock; return release times."""
+    clock = FakeClock(overshoot)
+    times = []
+
+    async def acquire():
+        async with limiter:
+            times.append(clock.now)
+            if on_release is not None:
+                on_release(len(times))
+
+    async def main():
+        await asyncio.gather(*(acquire() for _ in range(count)))
+
+    with mock.patch.object(batch_processor, "time", SimpleNamespace(monotonic=clock.monotonic)), \
+            mock.patch.object(batch_processor.asyncio, "sleep", clock.sleep):
+        asyncio.run(main())
+
+    return times
+
+
+def _release_gaps(limiter: AdaptiveLimiter, count: int, on_release=None) -> list[float]:
+    """Run count concurrent acquisitions on a fake clock; return gaps between releases."""
+    times = _release_times(limiter, count, on_release)
+    return [round(b - a, 6) for a, b in zip(times, times[1:])]
+
+
+def test_limiter_spacing():
+    """AdaptiveLimiter starts at max_rpm/2 and spaces requests evenly"""
+    print("=== AdaptiveLimiter Spacing Test ===")
+
+    limiter = AdaptiveLimiter(120)
+    assert limiter.current_rpm == 60
+
+    gaps = _release_gaps(limiter, 5)
+    print(f"Gaps: {gaps}")
+    assert gaps == [1.0] * 4, "Requests not spaced at 60 / current_rpm"
+    print("PASSED\n")
+
+
+def test_limiter_no_drift():
+    """Sleep overshoot does not accumulate: slot i is released near start + i * interval"""
+    print("=== AdaptiveLimiter Drift Test ===")
+
+    limiter = AdaptiveLimiter(120)
+    times = _release_times(limiter, 50, overshoot=0.05)
+    late = [round(t - (times[0] + i * 1.0), 6) for i, t in enumerate(times)]
+    print(f"Max lateness over {len(times)} releases: {max(late)}")
+    assert max(late) <= 0.05, "Sleep overshoot accumulated across releases"
+    print("PASSED\n")
+
+
+def test_limiter_probe():
+    """probe() raises the rate by 1 RPM every ADAPTIVE_PROBE_EVERY successes, capped at max_rpm"""
+    print("=== AdaptiveLimiter probe() Test ===")
+
+    limiter = AdaptiveLimiter(122)
+    for _ in range(batch_processor.ADAPTIVE_PROBE_EVERY - 1):
+        limiter.probe()
+    assert limiter.current_rpm == 61, "Rate raised too early"
+    limiter.probe()
+    assert limiter.current_rpm == 62
+
+    gaps = _release_gaps(limiter, 3)
+    print(f"Gaps at 62 RPM: {gaps}")
+    assert gaps == [round(60 / 62, 6)] * 2
+
+    for _ in range(100 * batch_processor.ADAPTIVE_PROBE_EVERY):
+        limiter.probe()
+    assert limiter.current_rpm == 122, "Rate exceeded max_rpm"
+    print("PASSED\n")
+
+
+def test_limiter_backoff():
+    """backoff() halves the rate, including for requests already waiting"""
+    print("=== AdaptiveLimiter backoff() Test ===")
+
+    limiter = AdaptiveLimiter(120)
+
+    # Back off after the 3rd release, while the remaining requests are queued.
+    gaps = _release_gaps(limiter, 6, lambda n: n == 3 and limiter.backoff())
+    print(f"Gaps: {gaps}")
+    assert limiter.current_rpm == 30
+    assert gaps == [1.0, 1.0, 2.0, 2.0, 2.0], "Queued requests kept the old rate"
+
+    # A burst of 429s within the cooldown halves the rate only once.
+    limiter = AdaptiveLimiter(120)
+    limiter.backoff()
+    limiter.backoff()
+    assert limiter.current_rpm == 30
+
+    limiter = AdaptiveLimiter(20)
+    limiter.backoff()
+    assert limiter.current_rpm == batch_processor.ADAPTIVE_MIN_RPM, "Rate dropped below the floor"
+    print("PASSED\n")
+
+
+def _status_error(status_code: int, retry_after: str | None = None) -> openai.APIStatusError:
+    """Build the error the SDK raises for an HTTP error response."""
+    headers = {"retry-after": retry_after} if retry_after is not None else {}
+    request = httpx.Request("POST", "https://example.invalid/chat/completions")
+    response = httpx.Response(status_code, headers=headers, request=request)
+    error_class = openai.RateLimitError if status_code == 429 else openai.APIStatusError
+    return error_class(f"Error code: {status_code}", response=response, body=None)
+
+
+def _run_with_failures(errors: list[Exception], max_retries: int, max_rpm: int = 120):
+    """Process one file with a client that raises errors before succeeding.
+
+    Returns (request times, log lines, limiter) on a fake clock.
+    """
+    clock = FakeClock()
+    request_times = []
+
+    class FakeClient:
+        config = SimpleNamespace(max_retries=max_retries)
+
+        async def query(self, prompt: str):
+            request_times.append(clock.now)
+            if len(request_times) <= len(errors):
+                raise errors[len(request_times) - 1]
+            return SimpleNamespace(choices=[])
+
+    async def main(limiter: AdaptiveLimiter, log: asyncio.Queue):
+        await process_file_async(batch_config, item, FakeClient(), asyncio.Semaphore(1), limiter, log)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _make_tree(Path(tmp, "input"), {"one.rs": "fn main() {}"})
+        batch_config = BatchConfig.build(str(Path(tmp, "input")), str(Path(tmp, "output")), save_raw=False)
+        prepare_dirs(batch_config)
+        item = (
+            str(Path(batch_config.input_dir, "one.rs")),
+            str(Path(batch_config.raw_dir, "one.txt")),
+            str(Path(batch_config.generated_dir, "one.json")),
+            "one.rs",
+        )
+        log: asyncio.Queue = asyncio.Queue()
+
+        with mock.patch.object(batch_processor, "time", SimpleNamespace(monotonic=clock.monotonic)), \
+                mock.patch.object(batch_processor.asyncio, "sleep", clock.sleep):
+            limiter = AdaptiveLimiter(max_rpm)
+            asyncio.run(main(limiter, log))
+
+    lines = []
+    while not log.empty():
+        lines.append(log.get_nowait())
+    return request_times, lines, limiter
+
+
+def test_retries_go_through_limiter():
+    """Retried 429s wait for the limiter, honor Retry-After and back off the rate"""
+    print("=== Retry Rate Limiting Test ===")
+
+    # Retry-After: 0 leaves the spacing entirely to the limiter.
+    errors = [_status_error(429, retry_after="0") for _ in range(4)]
+    times, lines, limiter = _run_with_failures(errors, max_retries=5)
+    gaps = [round(b - a, 6) for a, b in zip(times, times[1:])]
+    print(f"Attempts: {len(times)}, gaps: {gaps}, final rate: {limiter.current_rpm}")
+
+    assert len(times) == 5, "Failed requests were not retried"
+    # The first 429 halves the rate to 30 RPM. The next two fall within
+    # ADAPTIVE_BACKOFF_COOLDOWN of it, the fourth halves the rate again.
+    assert gaps == [2.0, 2.0, 2.0, 4.0], "Retry skipped the limiter"
+    assert limiter.current_rpm == 15
+    assert not any(line.startswith("[ERROR]") for line in lines)
+
+    # A Retry-After longer than the limiter interval is waited out in full.
+    times, lines, limiter = _run_with_failures([_status_error(503, retry_after="20")], max_retries=5)
+    print(f"Retry-After gap: {times[1] - times[0]}")
+    assert times[1] - times[0] >= 20, "Retry-After not honored"
+    assert limiter.current_rpm == 60, "A 503 backed off the rate"
+    print("PASSED\n")
+
+
+def test_retries_give_up():
+    """Non-retryable errors and exhausted retries are logged as [ERROR]"""
+    print("=== Retry Exhaustion Test ===")
+
+    times, lines, _ = _run_with_failures([_status_error(400)], max_retries=5)
+    assert len(times) == 1, "A 400 was retried"
+    assert lines[-1].startswith("[ERROR] one.rs")
+
+    errors = [_status_error(500) for _ in range(3)]
+    times, lines, _ = _run_with_failures(errors, max_retries=2)
+    print(f"Attempts with max_retries=2: {len(times)}")
+    assert len(times) == 3
+    assert lines[-1].startswith("[ERROR] one.rs")
+    print("PASSED\n")
+
+
+def test_min_duration_follows_ramp():
+    """_min_duration follows the limiter's ramp from max_rpm/2 up to max_rpm"""
+    print("=== Min Duration Estimate Test ===")
+
+    # The first ADAPTIVE_PROBE_EVERY requests go out at the starting rate.
+    assert _min_duration(10, 120) == 10.0
+    # 60..119 RPM for 600 requests, then 120 RPM for the rest.
+    ramp = sum(10 * 60 / rpm for rpm in range(60, 120))
+    assert abs(_min_duration(700, 120) - (ramp + 100 * 60 / 120)) < 1e-9
+    assert _min_duration(700, 120) > 700 * 60 / 120, "Estimate ignores the ramp"
+    print("PASSED\n")
+
+
+def test_find_files_matches_glob():
+    """_find_files returns the same files as Path.glob"""
+    print("=== File Discovery Test ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        _make_tree(root, {
+            "top.rs": "a",
+            "notes.txt": "b",
+            "sub/one.rs": "c",
+            "sub/deep/two.rs": "d",
+            "sub/deep/three.py": "e",
+            ".hidden/four.rs": "f",
+        })
+
+        for pattern in ["**/*.rs", "**/*.py", "sub/*.rs", "**/t*.rs"]:
+            found = sorted(_find_files(tmp, pattern))
+            expected = sorted(root.glob(pattern))
+            print(f"{pattern}: {len(found)} files")
+            assert found == expected, f"Mismatch for {pattern}: {found} != {expected}"
+
+    print("PASSED\n")
+
+
+def test_find_files_skips_missing_and_unreadable():
+    """_find_files, like Path.glob, skips missing and unreadable directories"""
+    print("=== File Discovery Error Handling Test ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        assert _find_files(str(root / "missing"), "**/*.rs") == []
+
+        _make_tree(root, {"one.rs": "a", "locked/two.rs": "b"})
+        (root / "locked").chmod(0)
+        try:
+            found = _find_files(tmp, "**/*.rs")
+            print(f"Found: {found}")
+            if os.access(root / "locked", os.R_OK):
+                print("Running with permission overrides (e.g. root), unreadable case not exercised")
+            else:
+                assert found == [root / "one.rs"], "Unreadable directory not skipped"
+        finally:
+            (root / "locked").chmod(0o755)
+
+    print("PASSED\n")
+
+
+def test_plan_work_skips_completed():
+    """_plan_work leaves out files that already have a generated output"""
+    print("=== Resume Planning Test ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_dir = Path(tmp) / "input"
+        _make_tree(input_dir, {"top.rs": "a", "sub/one.rs": "b", "sub/two.rs": "c"})
+
+        batch_config = BatchConfig.build(str(input_dir), str(Path(tmp) / "output"))
+        prepare_dirs(batch_config)
+        _make_tree(Path(batch_config.generated_dir), {"top.json": "{}", "sub/one.json": "{}"})
+
+        files, work, parents = _plan_work(batch_config)
+        print(f"Files: {len(files)}, remaining: {[item[3] for item in work]}")
+
+        assert len(files) == 3
+        assert [item[3] for item in work] == [str(Path("sub/two.rs"))]
+        input_path, raw_path, gen_path, _ = work[0]
+        assert input_path == str(input_dir.resolve() / "sub" / "two.rs")
+        assert raw_path == str(Path(batch_config.raw_dir, "sub", "two.txt"))
+        assert gen_path == str(Path(batch_config.generated_dir, "sub", "two.json"))
+        assert parents == {"sub"}
+
+    print("PASSED\n")
+
+
+def test_prepare_dirs_without_raw():
+    """prepare_dirs only creates raw_responses/ when raw output is saved"""
+    print("=== Output Directories Test ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        batch_config = BatchConfig.build(tmp, str(Path(tmp) / "output"), save_raw=False)
+        prepare_dirs(batch_config)
+        assert os.path.isdir(batch_config.generated_dir)
+        assert not os.path.exists(batch_config.raw_dir), "raw_responses/ created with save_raw=False"
+
+    print("PASSED\n")
+
+
+if __name__ == "__main__":
+    test_limiter_spacing()
+    test_limiter_no_drift()
+    test_limiter_probe()
+    test_limiter_backoff()
+    test_retries_go_through_limiter()
+    test_retries_give_up()
+    test_min_duration_follows_ramp()
+    test_find_files_matches_glob()
+    test_find_files_skips_missing_and_unreadable()
+    test_plan_work_skips_completed()
+    test_prepare_dirs_without_raw()
+    print("All batch logic tests passed!")